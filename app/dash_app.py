@@ -1,22 +1,33 @@
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-from io import StringIO
+import socket
+import time
 import webbrowser
 import threading
+from pathlib import Path
 
 import dash
-from dash import Dash, html, dcc, dash_table, Input, Output, State, no_update, callback_context
+from dash import Dash, html, dcc, dash_table, Input, Output, State, Patch, no_update, callback_context
 
 from .constants import (
     STATUS_TODO, STATUS_INPROGRESS, STATUS_REVIEW, STATUS_DONE
 )
 from .schema import TaskSchema
-from .repository import ExcelTaskRepository
+from .repository import ExcelTaskRepository, CALAMINE_READ_ERRORS
 from .dependency_service import DependencyService
 from .gantt_figure import GanttFigureBuilder
 from .ui_text import UI
 
 from dash import dcc, html
 
+# schema columns snapshotted once at import — the sync/table helpers run on
+# every edit and shouldn't re-resolve class attributes each call
+_COL_START = TaskSchema.COL_START
+_COL_END = TaskSchema.COL_END
+_ALL_COLS = tuple(TaskSchema.REQUIRED)
+
 upload_box = dcc.Upload(
     id="upload-xlsx",
     children=html.Div(["Drag and Drop or ", html.A("Select Excel (.xlsx)")]),
@@ -47,9 +58,14 @@ def _df_from_upload(contents: str, filename: str) -> pd.DataFrame:
     header, b64 = contents.split(",", 1)
     raw = base64.b64decode(b64)
 
-    # Excelをメモリから読む
+    # Excelをメモリから読む — calamine streams the sheet in one pass; fall
+    # back to the openpyxl default for workbooks it rejects
     bio = BytesIO(raw)
-    df = pd.read_excel(bio, sheet_name=0)  # 必要なら sheet選択UIも作れる
+    try:
+        df = pd.read_excel(bio, sheet_name=0, engine="calamine")  # 必要なら sheet選択UIも作れる
+    except CALAMINE_READ_ERRORS:
+        bio.seek(0)
+        df = pd.read_excel(bio, sheet_name=0)
     return df
 
 
@@ -61,8 +77,23 @@ class GanttDashApp:
         self.repo = repo
         self.dep = DependencyService()
         self.fig_builder = GanttFigureBuilder(self.dep)
-
-        self.app: Dash = dash.Dash(__name__)
+        # hash of the last table state we processed; rapid data_timestamp
+        # bursts that don't change the data short-circuit to no_update
+        self._last_edit_key: bytes | None = None
+        # result message from the background export writer (None = in flight)
+        self._export_result: str | None = None
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tm-io")
+        # recently parsed+normalized store payloads; several callbacks read
+        # the same payload within one interaction, and Dash serves them from
+        # worker threads, hence the small LRU behind a lock
+        self._store_cache: OrderedDict[bytes, pd.DataFrame] = OrderedDict()
+        self._store_cache_lock = threading.Lock()
+
+        try:
+            # gzip store/figure payloads (needs flask-compress)
+            self.app: Dash = dash.Dash(__name__, compress=True)
+        except ImportError:
+            self.app = dash.Dash(__name__)
         self._build_layout()
         self._register_callbacks()
 
@@ -70,14 +101,75 @@ class GanttDashApp:
     # Helpers
     # =========================
     def _to_table_rows(self, df: pd.DataFrame) -> list[dict]:
-        d = df.copy()
-        d[TaskSchema.COL_START] = pd.to_datetime(
-            d[TaskSchema.COL_START], errors="coerce"
-        ).dt.strftime("%Y-%m-%d %H:%M")
-        d[TaskSchema.COL_END] = pd.to_datetime(
-            d[TaskSchema.COL_END], errors="coerce"
-        ).dt.strftime("%Y-%m-%d %H:%M")
-        return d.to_dict("records")
+        def display(col):
+            if col == _COL_START and "_start_str" in df.columns:
+                return df["_start_str"]  # _normalize already formatted it
+            if col == _COL_END and "_end_str" in df.columns:
+                return df["_end_str"]
+            if col in (_COL_START, _COL_END):
+                s = df[col]
+                # already datetime64 after _normalize — re-parsing is wasted work
+                if not pd.api.types.is_datetime64_any_dtype(s):
+                    s = pd.to_datetime(s, errors="coerce")
+                return s.dt.strftime("%Y-%m-%d %H:%M")
+            return df[col]
+
+        # zip plain column lists into rows: no intermediate DataFrame and no
+        # per-row Series construction on the way to to_dict("records")
+        columns = [display(c).tolist() for c in _ALL_COLS]
+        return [dict(zip(_ALL_COLS, row)) for row in zip(*columns)]
+
+    def _to_store_records(self, df: pd.DataFrame) -> dict:
+        """Store payload: split orient — column names once, rows as plain
+        arrays — which is several times smaller on the wire than records."""
+        d = df.assign(**{
+            col: pd.to_datetime(df[col], errors="coerce").dt.strftime("%Y-%m-%dT%H:%M:%S")
+            for col in (_COL_START, _COL_END)
+        })
+        payload = d[list(_ALL_COLS)].to_dict("split", index=False)
+
+        # seed the parse cache: when the store change re-fires the gantt
+        # callback, _df_from_store finds this df instead of re-normalizing
+        self._store_cache_put(self._store_cache_key(payload), df)
+        return payload
+
+    @staticmethod
+    def _edit_key(df: pd.DataFrame) -> bytes:
+        """Content hash used to drop no-op table edits."""
+        return pd.util.hash_pandas_object(df[list(_ALL_COLS)], index=False).values.tobytes()
+
+    @staticmethod
+    def _trace_hidden(legendgroup, meta, hidden: set) -> bool:
+        if legendgroup and legendgroup in hidden:
+            return True
+        groups = (meta or {}).get("hide_if_any_hidden")
+        return bool(groups) and any(g in hidden for g in groups)
+
+    _STORE_CACHE_SIZE = 4
+
+    @staticmethod
+    def _store_cache_key(payload: dict) -> bytes:
+        return hashlib.blake2b(repr(payload).encode(), digest_size=16).digest()
+
+    def _store_cache_put(self, key: bytes, df: pd.DataFrame) -> None:
+        with self._store_cache_lock:
+            self._store_cache[key] = df
+            self._store_cache.move_to_end(key)
+            while len(self._store_cache) > self._STORE_CACHE_SIZE:
+                self._store_cache.popitem(last=False)
+
+    def _df_from_store(self, payload: dict) -> pd.DataFrame:
+        """Rebuild a normalized DataFrame from the Store payload (cached)."""
+        key = self._store_cache_key(payload)
+        with self._store_cache_lock:
+            df = self._store_cache.get(key)
+            if df is not None:
+                self._store_cache.move_to_end(key)
+                return df
+
+        df = self.repo._normalize(pd.DataFrame(payload["data"], columns=payload["columns"]))
+        self._store_cache_put(key, df)
+        return df
 
 
     upload_box = dcc.Upload(
@@ -100,8 +192,19 @@ class GanttDashApp:
     # =========================
     # Layout
     # =========================
+    @staticmethod
+    def _trace_groups(fig) -> list[list]:
+        """Per-trace (legendgroup, hide_if_any_hidden) pairs for the
+        visibility patch callback — spares it the full figure as State."""
+        spec = []
+        for tr in fig.data:
+            meta = getattr(tr, "meta", None) or {}
+            spec.append([getattr(tr, "legendgroup", None), meta.get("hide_if_any_hidden")])
+        return spec
+
     def _build_layout(self) -> None:
         df = self.repo.load()
+        fig = self.fig_builder.build(df)
 
         self.app.layout = html.Div(
             [
@@ -124,10 +227,13 @@ class GanttDashApp:
                 # ===== Stores =====
                 dcc.Store(
                     id=self.STORE_KEY,
-                    data=df.to_json(date_format="iso", orient="records"),
+                    data=self._to_store_records(df),
                 ),
                 dcc.Store(id=self.HIDDEN_KEY, data=[]),
+                dcc.Store(id="trace-groups", data=self._trace_groups(fig)),
                 dcc.Store(id="uploaded-filename", data=None),
+                dcc.Store(id="debounced-edit", data=None),
+                dcc.Interval(id="export-poll", interval=500, disabled=True),
 
                 # =========================
                 # Gantt (TOP)
@@ -137,7 +243,8 @@ class GanttDashApp:
                         html.H4(UI["title_gantt"]),
                         dcc.Graph(
                             id="gantt-graph",
-                            figure=self.fig_builder.build(df),
+                            figure=fig,
+                            config={"plotGlPixelRatio": 2},
                             style={"width": "100%"},
                         ),
                     ],
@@ -172,6 +279,8 @@ class GanttDashApp:
                             sort_action="native",
                             row_deletable=True,
                             page_action="none",
+                            virtualization=True,
+                            fixed_rows={"headers": True},
                             dropdown={
                                 TaskSchema.COL_STATUS: {
                                     "options": [
@@ -192,7 +301,10 @@ class GanttDashApp:
                             style_cell={
                                 "textAlign": "left",
                                 "padding": "6px",
+                                # virtualization needs an explicit width per
+                                # column to lay out the virtual rows correctly
                                 "minWidth": "120px",
+                                "width": "140px",
                                 "maxWidth": "260px",
                                 "whiteSpace": "normal",
                             },
@@ -209,13 +321,36 @@ class GanttDashApp:
     def _register_callbacks(self) -> None:
         app = self.app
 
+        # ---- Debounce table edits (clientside, ~400ms of quiet) ----
+        app.clientside_callback(
+            """
+            function(ts) {
+                if (!ts) { return window.dash_clientside.no_update; }
+                return new Promise(function(resolve) {
+                    if (window._tmEditTimer) {
+                        clearTimeout(window._tmEditTimer);
+                        window._tmEditResolve(window.dash_clientside.no_update);
+                    }
+                    window._tmEditResolve = resolve;
+                    window._tmEditTimer = setTimeout(function() {
+                        window._tmEditTimer = null;
+                        resolve(ts);
+                    }, 400);
+                });
+            }
+            """,
+            Output("debounced-edit", "data"),
+            Input("tasks-table", "data_timestamp"),
+            prevent_initial_call=True,
+        )
+
         # ---- Table ↔ Store ----
         @app.callback(
             Output(self.STORE_KEY, "data"),
             Output("tasks-table", "data"),
             Output("uploaded-filename", "data"),  # ★追加
             Input("btn-reload", "n_clicks"),
-            Input("tasks-table", "data_timestamp"),
+            Input("debounced-edit", "data"),
             Input("upload-xlsx", "contents"),
             State("upload-xlsx", "filename"),  # ★filename受け取り
             State("tasks-table", "data"),
@@ -237,10 +372,13 @@ class GanttDashApp:
 
                 self.repo._validate_columns(df)
                 df = self.repo._normalize(df)
+                # re-key the edit dedup to the uploaded data, or an identical
+                # follow-up edit would be dropped as a no-op
+                self._last_edit_key = self._edit_key(df)
 
                 # ★ここで filename を保存
                 return (
-                    df.to_json(date_format="iso", orient="records"),
+                    self._to_store_records(df),
                     self._to_table_rows(df),
                     upload_filename,  # ← これが "uploaded-filename" store に入る
                 )
@@ -248,92 +386,126 @@ class GanttDashApp:
             # Reload（元の固定ファイルから）
             if trigger == "btn-reload.n_clicks":
                 df = self.repo.load()
-                return df.to_json(date_format="iso", orient="records"), self._to_table_rows(df), no_update
+                # same re-key as the upload branch: the store now holds the
+                # reloaded data, so stale edit hashes must not suppress edits
+                self._last_edit_key = self._edit_key(df)
+                return self._to_store_records(df), self._to_table_rows(df), no_update
 
-            # Table edit
-            if trigger == "tasks-table.data_timestamp":
+            # Table edit (debounced)
+            if trigger == "debounced-edit.data":
                 if table_rows is None:
                     return no_update, no_update, no_update
-                df = pd.DataFrame(table_rows)
+                # fixed column list: skips pandas schema inference over dicts
+                df = pd.DataFrame.from_records(table_rows, columns=list(_ALL_COLS))
                 df = self.repo._normalize(df)
-                return df.to_json(date_format="iso", orient="records"), self._to_table_rows(df), no_update
+
+                key = self._edit_key(df)
+                if key == self._last_edit_key:
+                    return no_update, no_update, no_update
+                self._last_edit_key = key
+
+                # leave the user's rows as typed — writing the reformatted rows
+                # back would re-render the whole table on every edit
+                return self._to_store_records(df), no_update, no_update
 
             return no_update, no_update, no_update
 
-        # ---- Gantt redraw ----
+        # ---- Gantt: full rebuild only when the task data changes ----
         @app.callback(
             Output("gantt-graph", "figure"),
+            Output("trace-groups", "data"),
             Input(self.STORE_KEY, "data"),
-            Input(self.HIDDEN_KEY, "data"),
+            State(self.HIDDEN_KEY, "data"),
+            # the layout already embeds the initial figure — don't rebuild it
+            prevent_initial_call=True,
         )
-        def update_gantt(store_json, hidden_groups):
-            if not store_json:
-                return no_update
+        def update_gantt(store_records, hidden_groups):
+            if not store_records:
+                return no_update, no_update
 
-            df = pd.read_json(StringIO(store_json), orient="records")
-            df = self.repo._normalize(df)
+            df = self._df_from_store(store_records)
             fig = self.fig_builder.build(df)
 
             hidden = set(hidden_groups or [])
-            for tr in fig.data:
-                lg = getattr(tr, "legendgroup", None)
-
-                if lg and lg in hidden:
-                    tr.visible = "legendonly"
-                    continue
+            # fig may come from the builder cache, so set visibility both ways;
+            # two plotly_restyle calls instead of a validator hit per trace
+            hide_idx, show_idx = [], []
+            for i, tr in enumerate(fig.data):
+                hide = self._trace_hidden(
+                    getattr(tr, "legendgroup", None), getattr(tr, "meta", None), hidden
+                )
+                (hide_idx if hide else show_idx).append(i)
 
-                meta = getattr(tr, "meta", None) or {}
-                groups = meta.get("hide_if_any_hidden")
-                if groups and any(g in hidden for g in groups):
-                    tr.visible = "legendonly"
+            if hide_idx:
+                fig.plotly_restyle({"visible": "legendonly"}, trace_indexes=hide_idx)
+            if show_idx:
+                fig.plotly_restyle({"visible": True}, trace_indexes=show_idx)
 
-            fig.update_layout(uirevision="gantt")
-            return fig
+            # uirevision is baked into the builder's layout — no relayout here
+            return fig, self._trace_groups(fig)
 
-        # ---- Track legend hide/show ----
+        # ---- Gantt: legend toggles patch visibility only, no rebuild ----
         @app.callback(
+            Output("gantt-graph", "figure", allow_duplicate=True),
+            Input(self.HIDDEN_KEY, "data"),
+            # the per-trace groups store stands in for the full figure State,
+            # so the browser doesn't upload the whole figure on every toggle
+            State("trace-groups", "data"),
+            prevent_initial_call=True,
+        )
+        def apply_hidden_groups(hidden_groups, trace_groups):
+            if not trace_groups:
+                return no_update
+
+            hidden = set(hidden_groups or [])
+            patch = Patch()
+            for i, (lg, any_hidden) in enumerate(trace_groups):
+                hide = self._trace_hidden(lg, {"hide_if_any_hidden": any_hidden} if any_hidden else None, hidden)
+                patch["data"][i]["visible"] = "legendonly" if hide else True
+            return patch
+
+        # ---- Track legend hide/show (clientside: no server round-trip) ----
+        app.clientside_callback(
+            """
+            function(restyle, fig, hidden) {
+                if (!restyle || !fig) { return hidden || []; }
+                var hiddenSet = new Set(hidden || []);
+                var changes = restyle[0];
+                var idxs = restyle[1];
+                if (!('visible' in changes)) { return Array.from(hiddenSet); }
+                var newVis = changes['visible'];
+                for (var k = 0; k < idxs.length; k++) {
+                    var tr = fig.data[idxs[k]];
+                    var lg = tr ? tr.legendgroup : null;
+                    if (!lg) { continue; }
+                    var v = Array.isArray(newVis) ? newVis[k] : newVis;
+                    if (v === 'legendonly') { hiddenSet.add(lg); }
+                    else { hiddenSet.delete(lg); }
+                }
+                return Array.from(hiddenSet);
+            }
+            """,
             Output(self.HIDDEN_KEY, "data"),
             Input("gantt-graph", "restyleData"),
             State("gantt-graph", "figure"),
             State(self.HIDDEN_KEY, "data"),
             prevent_initial_call=True,
         )
-        def update_hidden_groups(restyle, fig, hidden):
-            if not restyle or not fig:
-                return hidden
-
-            hidden_set = set(hidden or [])
-            changes, idxs = restyle
-
-            if "visible" not in changes:
-                return list(hidden_set)
-
-            new_vis = changes["visible"]
-            for i in idxs:
-                lg = fig["data"][i].get("legendgroup")
-                if not lg:
-                    continue
-                if new_vis == "legendonly":
-                    hidden_set.add(lg)
-                else:
-                    hidden_set.discard(lg)
-
-            return list(hidden_set)
 
-        # ---- Export Excel ----
+        # ---- Export Excel (writes on a worker thread; poll for the result) ----
         @app.callback(
             Output("export-msg", "children"),
+            Output("export-poll", "disabled"),
             Input("btn-export", "n_clicks"),
             State(self.STORE_KEY, "data"),
             State("uploaded-filename", "data"),  # ★追加
             prevent_initial_call=True,
         )
-        def export_excel(_n, store_json, uploaded_filename):
-            if not store_json:
-                return UI["msg_no_data"]
+        def export_excel(_n, store_records, uploaded_filename):
+            if not store_records:
+                return UI["msg_no_data"], True
 
-            df = pd.read_json(StringIO(store_json), orient="records")
-            df = self.repo._normalize(df)
+            df = self._df_from_store(store_records)
 
             # ★保存名を決める（アップロードがあればそれ優先）
             if uploaded_filename:
@@ -347,13 +519,55 @@ class GanttDashApp:
             # サーバ側の保存先（プロジェクトフォルダに出す例）
             out_path = self.repo.xlsx_path.with_name(out_name)
 
-            self.repo.save(df, out_path)
-            return f'{UI["msg_saved_prefix"]} {out_path.name}'
+            self._export_result = None
+
+            def write():
+                try:
+                    self.repo.save(df, out_path)
+                    self._export_result = f'{UI["msg_saved_prefix"]} {out_path.name}'
+                except Exception as e:
+                    self._export_result = f"Export failed: {e}"
+
+            self._io_pool.submit(write)
+            return f'{UI["msg_saving_prefix"]} {out_path.name}', False
+
+        @app.callback(
+            Output("export-msg", "children", allow_duplicate=True),
+            Output("export-poll", "disabled", allow_duplicate=True),
+            Input("export-poll", "n_intervals"),
+            prevent_initial_call=True,
+        )
+        def poll_export(_n):
+            if self._export_result is None:
+                return no_update, no_update
+            return self._export_result, True
 
     # =========================
     # Run
     # =========================
-    def run(self, host="127.0.0.1", port=8050, debug=True):
+    def run(self, host="127.0.0.1", port=8050, debug=False):
         url = f"http://{host}:{port}/"
-        threading.Timer(1.0, lambda: webbrowser.open_new(url)).start()
-        self.app.run(host=host, port=port, debug=debug, use_reloader=False)
+
+        def open_when_ready(timeout=5.0, step=0.05):
+            # poll until the server socket accepts, instead of a blind sleep
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                try:
+                    with socket.create_connection((host, port), timeout=0.1):
+                        break
+                except OSError:
+                    time.sleep(step)
+            webbrowser.open_new(url)
+
+        threading.Thread(target=open_when_ready, daemon=True).start()
+        # even with debug=True, skip the dev-tools extras that poll every
+        # open tab (hot reload) or validate props on each callback response
+        self.app.run(
+            host=host,
+            port=port,
+            debug=debug,
+            use_reloader=False,
+            dev_tools_hot_reload=False,
+            dev_tools_props_check=False,
+            dev_tools_ui=False,
+        )
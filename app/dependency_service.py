@@ -7,32 +7,75 @@ import pandas as pd
 # from .constants import TaskSchema
 from .schema import TaskSchema
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the pandas path below covers it
+    njit = None
+
+
+if njit is not None:
+
+    @njit(cache=True)
+    def _blocked_kernel(parent_code, has_parent, prog_by_code):
+        n = parent_code.size
+        out = np.empty(n, np.bool_)
+        for i in range(n):
+            if not has_parent[i]:
+                out[i] = False
+            elif parent_code[i] < 0:  # parent ID not in the task list
+                out[i] = True
+            else:
+                out[i] = prog_by_code[parent_code[i]] < 100.0
+        return out
+
+else:
+    _blocked_kernel = None
+
 
 class DependencyService:
     COL_BLOCK = "Blocked"  # OK / BLOCKED
 
-    def add_blocked(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        id_to_prog = df.set_index(TaskSchema.COL_ID)[TaskSchema.COL_PROGRESS].to_dict()
-        id_exists = set(id_to_prog.keys())
+    def blocked_mask(self, df: pd.DataFrame) -> pd.Series:
+        if _blocked_kernel is not None:
+            ids = pd.Categorical(df[TaskSchema.COL_ID].astype(str))
+            parent = df[TaskSchema.COL_PARENT].astype(str).str.strip()
+            parent_code = pd.Categorical(parent, categories=ids.categories).codes
 
-        def blocked(row) -> bool:
-            parent = str(row.get(TaskSchema.COL_PARENT, "")).strip()
-            if parent == "":
-                return False
-            if parent not in id_exists:
-                return True
-            return float(id_to_prog[parent]) < 100
+            # progress indexed by ID code; in-order assignment keeps the
+            # "last one wins" semantics on duplicate IDs
+            prog = pd.to_numeric(df[TaskSchema.COL_PROGRESS], errors="coerce").fillna(0).to_numpy(np.float64)
+            prog_by_code = np.zeros(len(ids.categories), np.float64)
+            prog_by_code[ids.codes] = prog
 
-        df[self.COL_BLOCK] = np.where(df.apply(blocked, axis=1), "BLOCKED", "OK")
-        return df
+            out = _blocked_kernel(
+                parent_code.astype(np.int64),
+                (parent != "").to_numpy(),
+                prog_by_code,
+            )
+            return pd.Series(out, index=df.index)
+
+        prog_map = df.set_index(TaskSchema.COL_ID)[TaskSchema.COL_PROGRESS].astype(float)
+        # same "last one wins" semantics as the old dict lookup on duplicate IDs
+        prog_map = prog_map[~prog_map.index.duplicated(keep="last")]
+
+        parent = df[TaskSchema.COL_PARENT].astype(str).str.strip()
+        parent_prog = parent.map(prog_map)
+        # blocked = has a parent AND (parent unknown OR parent not 100% done)
+        return (parent != "") & (parent_prog.isna() | (parent_prog < 100))
+
+    def add_blocked(self, df: pd.DataFrame) -> pd.DataFrame:
+        # assign() adds the column without deep-copying every existing one
+        mask = self.blocked_mask(df)
+        return df.assign(**{self.COL_BLOCK: np.where(mask.to_numpy(), "BLOCKED", "OK")})
 
     def iter_dependencies(self, df: pd.DataFrame) -> List[Tuple[str, str]]:
-        deps: List[Tuple[str, str]] = []
-        id_set = set(df[TaskSchema.COL_ID].astype(str))
-        for _, r in df.iterrows():
-            child = str(r[TaskSchema.COL_ID])
-            parent = str(r[TaskSchema.COL_PARENT]).strip()
-            if parent and parent in id_set:
-                deps.append((parent, child))
-        return deps
+        child = df[TaskSchema.COL_ID].astype(str)
+        parent = df[TaskSchema.COL_PARENT].astype(str).str.strip()
+
+        # keep only edges whose parent actually exists as a task ID
+        pairs = pd.DataFrame({"_child": child, "_parent": parent})
+        pairs = pairs[pairs["_parent"] != ""]
+        ids = pd.DataFrame({"_id": child.unique()})
+        merged = pairs.merge(ids, left_on="_parent", right_on="_id")
+
+        return list(zip(merged["_parent"].to_numpy(), merged["_child"].to_numpy()))
@@ -1,6 +1,9 @@
 # app/gantt_figure.py
 from __future__ import annotations
 
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
 from typing import List, Tuple, Dict, Any
 
 import numpy as np
@@ -46,10 +49,43 @@ class GanttFigureBuilder:
       - Each lock trace has meta={"hide_if_any_hidden":[its_group]}.
     """
 
+    # bounces between a handful of recent data states (undo, retry) are the
+    # common pattern in the dashboard, so keep a few figures, not just one
+    _FIG_CACHE_SIZE = 8
+
     def __init__(self, dependency_service: DependencyService):
         self.dep = dependency_service
+        # recent builds, keyed by a fingerprint of the task data (LRU)
+        self._fig_cache: "OrderedDict[bytes, go.Figure]" = OrderedDict()
+        # dependency edges, keyed by a hash of the ID/parent columns only —
+        # edits that don't touch those columns reuse the previous edge list
+        self._deps_key: bytes | None = None
+        self._deps: List[Tuple[str, str]] | None = None
 
     # -------- helpers --------
+    @staticmethod
+    def _fingerprint(df: pd.DataFrame) -> bytes:
+        cols = [c for c in TaskSchema.REQUIRED if c in df.columns]
+        raw = pd.util.hash_pandas_object(df[cols], index=False).values.tobytes()
+        return hashlib.blake2b(raw, digest_size=16).digest()
+
+    def _dependencies(self, df_chart: pd.DataFrame) -> List[Tuple[str, str]]:
+        key = pd.util.hash_pandas_object(
+            df_chart[[TaskSchema.COL_ID, TaskSchema.COL_PARENT]], index=False
+        ).values.tobytes()
+        if self._deps is None or key != self._deps_key:
+            self._deps = self.dep.iter_dependencies(df_chart)
+            self._deps_key = key
+        return self._deps
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _category_colors(keys: Tuple[str, ...]) -> Dict[str, str]:
+        # palette assignment is invariant for a given key order — memoize it
+        # so repeated builds skip the cycle (and keep colors stable)
+        palette = px.colors.qualitative.Plotly
+        return {key: palette[i % len(palette)] for i, key in enumerate(keys)}
+
     @staticmethod
     def task_legendgroup(row: Dict[str, Any]) -> str:
         st = str(row.get(TaskSchema.COL_STATUS, "")).strip()
@@ -60,175 +96,201 @@ class GanttFigureBuilder:
         cat = str(row.get(TaskSchema.COL_CATEGORY, "")).strip()
         return f"cat:{cat}"
 
-    def add_weekend_vrects(self, fig: go.Figure, start_date, end_date) -> None:
-        current = pd.to_datetime(start_date).normalize()
-        end = pd.to_datetime(end_date).normalize()
-
-        while current <= end:
-            if current.weekday() == 5:  # Saturday
-                fig.add_vrect(
-                    x0=current,
-                    x1=current + pd.Timedelta(days=1),
-                    fillcolor="rgba(173, 216, 230, 0.25)",
-                    line_width=0,
-                    layer="below",
-                )
-            elif current.weekday() == 6:  # Sunday
-                fig.add_vrect(
-                    x0=current,
-                    x1=current + pd.Timedelta(days=1),
-                    fillcolor="rgba(255, 182, 193, 0.30)",
+    def weekend_shapes(self, start_date, end_date) -> List[dict]:
+        days = pd.date_range(
+            pd.to_datetime(start_date).normalize(),
+            pd.to_datetime(end_date).normalize(),
+            freq="D",
+        )
+        weekday = days.weekday
+
+        def band_shapes(dates, fillcolor):
+            return [
+                dict(
+                    type="rect",
+                    xref="x", yref="paper",
+                    x0=d, x1=d + pd.Timedelta(days=1),
+                    y0=0, y1=1,
+                    fillcolor=fillcolor,
                     line_width=0,
                     layer="below",
                 )
-            current += pd.Timedelta(days=1)
+                for d in dates
+            ]
+
+        shapes = band_shapes(days[weekday == 5], "rgba(173, 216, 230, 0.25)")   # Saturday
+        shapes += band_shapes(days[weekday == 6], "rgba(255, 182, 193, 0.30)")  # Sunday
+        return shapes
 
     # -------- main --------
     def build(self, df_in: pd.DataFrame) -> go.Figure:
-        # Normalize dates
-        df = df_in.copy()
-        df[TaskSchema.COL_START] = pd.to_datetime(df[TaskSchema.COL_START], errors="coerce")
-        df[TaskSchema.COL_END] = pd.to_datetime(df[TaskSchema.COL_END], errors="coerce")
-
-        df_chart = df.dropna(subset=[TaskSchema.COL_START, TaskSchema.COL_END]).copy()
+        # Bind the schema names once — build() references them dozens of
+        # times and repeated class-attribute lookups add up in this path
+        COL_START, COL_END = TaskSchema.COL_START, TaskSchema.COL_END
+        COL_NAME, COL_ID = TaskSchema.COL_NAME, TaskSchema.COL_ID
+        COL_PARENT, COL_PROGRESS = TaskSchema.COL_PARENT, TaskSchema.COL_PROGRESS
+        COL_STATUS, COL_CATEGORY = TaskSchema.COL_STATUS, TaskSchema.COL_CATEGORY
+        COL_BLOCK = DependencyService.COL_BLOCK
+
+        # Rebuild only when the task data actually changed (table edits fire
+        # this on every keystroke); otherwise hand back the cached figure.
+        key = self._fingerprint(df_in)
+        cached = self._fig_cache.get(key)
+        if cached is not None:
+            self._fig_cache.move_to_end(key)
+            return cached
+
+        # Normalize dates — _normalize already hands us datetime64 columns,
+        # so only re-parse (via assign, no deep copy) what actually needs it
+        to_parse = {
+            col: pd.to_datetime(df_in[col], errors="coerce")
+            for col in (COL_START, COL_END)
+            if not pd.api.types.is_datetime64_any_dtype(df_in[col])
+        }
+        df = df_in.assign(**to_parse) if to_parse else df_in
+
+        df_chart = df.dropna(subset=[COL_START, COL_END])
         df_chart = self.dep.add_blocked(df_chart)
 
-        # Split by status
-        df_normal = df_chart[df_chart[TaskSchema.COL_STATUS].isin([STATUS_TODO, STATUS_INPROGRESS])].copy()
-        df_review = df_chart[df_chart[TaskSchema.COL_STATUS] == STATUS_REVIEW].copy()
-        df_done = df_chart[df_chart[TaskSchema.COL_STATUS] == STATUS_DONE].copy()
+        # Review/Done are drawn in gray regardless of category, so fold status
+        # into a single color key and build the base bars in one pass instead
+        # of one per status bucket.
+        status = df_chart[COL_STATUS]
+        is_status = [status == STATUS_REVIEW, status == STATUS_DONE]
+        df_chart["_color_key"] = np.select(
+            is_status, ["Review", "Done"], default=df_chart[COL_CATEGORY]
+        )
+        df_chart["_legendgroup"] = np.select(
+            is_status,
+            ["status:Review", "status:Done"],
+            default="cat:" + df_chart[COL_CATEGORY].astype(str),
+        )
 
-        fig = go.Figure()
+        # Traces are accumulated in a plain list and handed to go.Figure once
+        # at the end — each incremental add_trace re-copies figure state.
+        traces: List[Any] = []
 
         # -------------------------
-        # 1) Base bars
+        # 1) Base bars (direct go.Bar per color key; px.timeline spends most
+        #    of its time expanding hover_data and deriving the palette, both
+        #    of which are precomputed here)
         # -------------------------
-        if not df_normal.empty:
-            fig_base = px.timeline(
-                df_normal,
-                x_start=TaskSchema.COL_START,
-                x_end=TaskSchema.COL_END,
-                y=TaskSchema.COL_NAME,
-                color=TaskSchema.COL_CATEGORY,
-                hover_data=[
-                    TaskSchema.COL_ID,
-                    TaskSchema.COL_PARENT,
-                    TaskSchema.COL_PROGRESS,
-                    TaskSchema.COL_START,
-                    TaskSchema.COL_END,
-                    TaskSchema.COL_STATUS,
-                    DependencyService.COL_BLOCK,
-                    TaskSchema.COL_CATEGORY,
-                ],
+        if not df_chart.empty:
+            status_colors = {
+                "Review": "rgba(160,160,160,0.85)",
+                "Done": "rgba(90,90,90,0.90)",
+            }
+
+            # hover customdata built once for the whole chart
+            hover_start = (
+                df_chart["_start_str"]
+                if "_start_str" in df_chart.columns
+                else df_chart[COL_START].dt.strftime("%Y-%m-%d %H:%M")
             )
-            for tr in fig_base.data:
-                cat = tr.name
-                tr.legendgroup = f"cat:{cat}"
-            fig.add_traces(fig_base.data)
-
-        if not df_review.empty:
-            fig_review = px.timeline(
-                df_review,
-                x_start=TaskSchema.COL_START,
-                x_end=TaskSchema.COL_END,
-                y=TaskSchema.COL_NAME,
+            hover_end = (
+                df_chart["_end_str"]
+                if "_end_str" in df_chart.columns
+                else df_chart[COL_END].dt.strftime("%Y-%m-%d %H:%M")
             )
-            for tr in fig_review.data:
-                tr.showlegend = False
-                tr.marker.color = "rgba(160,160,160,0.85)"
-                tr.legendgroup = "status:Review"
-            fig.add_traces(fig_review.data)
-
-        if not df_done.empty:
-            fig_done = px.timeline(
-                df_done,
-                x_start=TaskSchema.COL_START,
-                x_end=TaskSchema.COL_END,
-                y=TaskSchema.COL_NAME,
+            customdata = np.column_stack([
+                df_chart[COL_ID].astype(object),
+                df_chart[COL_PARENT].astype(object),
+                df_chart[COL_PROGRESS].astype(object),
+                hover_start.astype(object),
+                hover_end.astype(object),
+                df_chart[COL_STATUS].astype(object),
+                df_chart[COL_BLOCK].astype(object),
+                df_chart[COL_CATEGORY].astype(object),
+            ])
+            hover_lines = "<br>".join(
+                f"{label}=%{{customdata[{i}]}}"
+                for i, label in enumerate([
+                    COL_ID,
+                    COL_PARENT,
+                    COL_PROGRESS,
+                    COL_START,
+                    COL_END,
+                    COL_STATUS,
+                    COL_BLOCK,
+                    COL_CATEGORY,
+                ])
             )
-            for tr in fig_done.data:
-                tr.showlegend = False
-                tr.marker.color = "rgba(90,90,90,0.90)"
-                tr.legendgroup = "status:Done"
-            fig.add_traces(fig_done.data)
 
-        # -------------------------
-        # Layout
-        # -------------------------
-        fig.update_yaxes(type="category", autorange="reversed")
-        fig.update_xaxes(type="date",
-                         tickformat="%Y-%m-%d\n%H:%M",
-                         dtick=24*60*60*1000,
-                         )
-        fig.update_layout(
-            title=UI["title_gantt_full"],
-            height=max(520, 28 * max(len(df_chart), 1) + 260),
-            xaxis_title=UI["xaxis"],
-            yaxis_title=UI["yaxis"],
-            legend_title_text=UI["legend_category"],
-            barmode="overlay",
-            legend=dict(groupclick="togglegroup"),
-            # keep legend toggles even if figure is regenerated
-            uirevision="gantt",
-        )
+            base_ns = df_chart[COL_START].to_numpy("datetime64[ns]")
+            dur_ms = (
+                df_chart[COL_END].to_numpy("datetime64[ns]").astype("int64")
+                - base_ns.astype("int64")
+            ) / 1e6
+            names_arr = df_chart[COL_NAME].to_numpy()
+
+            groups = df_chart.groupby("_color_key", sort=False).indices
+            cat_colors = self._category_colors(
+                tuple(k for k in groups if k not in status_colors)
+            )
+            for color_key, pos_idx in groups.items():
+                is_status_key = color_key in status_colors
+                traces.append(
+                    go.Bar(
+                        name=color_key,
+                        base=base_ns[pos_idx],
+                        x=dur_ms[pos_idx],  # bar length on a date axis is milliseconds
+                        y=names_arr[pos_idx],
+                        orientation="h",
+                        marker=dict(color=status_colors[color_key] if is_status_key else cat_colors[color_key]),
+                        legendgroup=f"status:{color_key}" if is_status_key else f"cat:{color_key}",
+                        legendgrouptitle=dict(text="Status") if is_status_key else None,
+                        customdata=customdata[pos_idx],
+                        hovertemplate=(
+                            f"{UI['legend_category']}={color_key}<br>"
+                            f"{COL_NAME}=%{{y}}<br>"
+                            + hover_lines
+                            + "<extra></extra>"
+                        ),
+                    )
+                )
 
         # -------------------------
         # 2) Progress overlay (same legendgroup)
         # -------------------------
-        def add_progress_overlay(df_subset: pd.DataFrame, legendgroup: str):
-            if df_subset.empty:
-                return
-
-            d = df_subset.copy()
-            # progress end time
-            d["_progress_end"] = d[TaskSchema.COL_START] + (d[TaskSchema.COL_END] - d[TaskSchema.COL_START]) * (
-                pd.to_numeric(d[TaskSchema.COL_PROGRESS], errors="coerce").fillna(0) / 100.0
-            )
-            d_end = d.copy()
-            d_end[TaskSchema.COL_END] = d_end["_progress_end"]
-
-            fig_prog = px.timeline(
-                d_end,
-                x_start=TaskSchema.COL_START,
-                x_end=TaskSchema.COL_END,
-                y=TaskSchema.COL_NAME,
-            )
-
-            prog_custom = np.stack([pd.to_numeric(d[TaskSchema.COL_PROGRESS], errors="coerce").fillna(0).to_numpy()], axis=-1)
-
-            for tr in fig_prog.data:
-                tr.showlegend = False
-                tr.marker.opacity = 0.30
-                tr.marker.color = "rgba(0,0,0,0.35)"
-                tr.legendgroup = legendgroup
-                tr.customdata = prog_custom
-                tr.hovertemplate = "Progress: %{customdata[0]}%<extra></extra>"
-
-            fig.add_traces(fig_prog.data)
-
-        # Normal grouped by category
-        if not df_normal.empty:
-            for cat, df_cat in df_normal.groupby(TaskSchema.COL_CATEGORY):
-                add_progress_overlay(df_cat, legendgroup=f"cat:{cat}")
-
-        add_progress_overlay(df_review, legendgroup="status:Review")
-        add_progress_overlay(df_done, legendgroup="status:Done")
+        # Done-length computed once for the whole chart in int64 nanoseconds
+        # (no Timestamp arithmetic, no px.timeline pipeline per subset), then
+        # one Bar per legendgroup straight from a single groupby pass.
+        if not df_chart.empty:
+            s_all = df_chart[COL_START].to_numpy("datetime64[ns]").astype("int64")
+            e_all = df_chart[COL_END].to_numpy("datetime64[ns]").astype("int64")
+            p_all = pd.to_numeric(df_chart[COL_PROGRESS], errors="coerce").fillna(0).to_numpy(np.float64)
+            done_ns = ((e_all - s_all) * (p_all * 0.01)).astype("int64")
+
+            for lg, pos_idx in df_chart.groupby("_legendgroup").indices.items():
+                traces.append(
+                    go.Bar(
+                        base=s_all[pos_idx].view("datetime64[ns]"),
+                        x=done_ns[pos_idx] / 1e6,  # bar length on a date axis is milliseconds
+                        y=df_chart[COL_NAME].to_numpy()[pos_idx],
+                        orientation="h",
+                        marker=dict(color="rgba(0,0,0,0.35)", opacity=0.30),
+                        showlegend=False,
+                        legendgroup=lg,
+                        customdata=np.stack([p_all[pos_idx]], axis=-1),
+                        hovertemplate="Progress: %{customdata[0]}%<extra></extra>",
+                    )
+                )
 
         # -------------------------
         # 3) LOCK icons (legend-linked + meta)
         # -------------------------
-        blocked_df = df_chart[df_chart[DependencyService.COL_BLOCK] == "BLOCKED"]
+        blocked_df = df_chart[df_chart[COL_BLOCK] == "BLOCKED"]
         if not blocked_df.empty:
-            for _, r in blocked_df.iterrows():
-                lg = self.task_legendgroup(r.to_dict())
-                fig.add_trace(
+            # one vectorized text trace per legendgroup, not one per task
+            for lg, d in blocked_df.groupby("_legendgroup"):
+                traces.append(
                     go.Scatter(
-                        x=[r[TaskSchema.COL_START]],
-                        y=[r[TaskSchema.COL_NAME]],
+                        x=d[COL_START],
+                        y=d[COL_NAME],
                         mode="text",
-                        text=["🔒"],
+                        text=["🔒"] * len(d),
                         textposition="middle left",
-                        hovertext=[UI["blocked_hover"]],
+                        hovertext=[UI["blocked_hover"]] * len(d),
                         hoverinfo="text",
                         showlegend=False,
                         legendgroup=lg,
@@ -239,21 +301,40 @@ class GanttFigureBuilder:
         # -------------------------
         # 4) Dependencies (as traces + meta parent/child)
         # -------------------------
-        id_to_row = df_chart.set_index(TaskSchema.COL_ID).to_dict(orient="index")
-        for parent_id, child_id in self.dep.iter_dependencies(df_chart):
-            parent = id_to_row[parent_id]
-            child = id_to_row[child_id]
-
-            parent_lg = self.task_legendgroup(parent)
-            child_lg = self.task_legendgroup(child)
-
-            meta_dep = {"kind": "dep", "hide_if_any_hidden": [parent_lg, child_lg]}
-
-            # line
-            fig.add_trace(
-                go.Scatter(
-                    x=[parent[TaskSchema.COL_END], child[TaskSchema.COL_START]],
-                    y=[parent[TaskSchema.COL_NAME], child[TaskSchema.COL_NAME]],
+        # Batch edges into one None-separated line trace (plus one arrowhead
+        # trace) per (parent group, child group) pair — the pair is what drives
+        # hide_if_any_hidden, so merging within a pair keeps legend behavior.
+        # SoA lookup: positional index into plain column arrays instead of a
+        # dict-of-dicts per task (no boxed row dicts, contiguous reads)
+        ids = df_chart[COL_ID].to_numpy()
+        pos = {tid: i for i, tid in enumerate(ids)}
+        starts = df_chart[COL_START].to_numpy()
+        ends = df_chart[COL_END].to_numpy()
+        names = df_chart[COL_NAME].to_numpy()
+        lgs = df_chart["_legendgroup"].to_numpy()
+
+        edges_by_groups: Dict[Tuple[str, str], Tuple[list, list, list, list]] = {}
+        for parent_id, child_id in self._dependencies(df_chart):
+            pi = pos[parent_id]
+            ci = pos[child_id]
+
+            pair = (lgs[pi], lgs[ci])
+            xs, ys, head_x, head_y = edges_by_groups.setdefault(pair, ([], [], [], []))
+
+            xs += [ends[pi], starts[ci], None]
+            ys += [names[pi], names[ci], None]
+            head_x.append(starts[ci])
+            head_y.append(names[ci])
+
+        for (parent_lg, child_lg), (xs, ys, head_x, head_y) in edges_by_groups.items():
+            groups = [parent_lg] if parent_lg == child_lg else [parent_lg, child_lg]
+            meta_dep = {"kind": "dep", "hide_if_any_hidden": groups}
+
+            # lines (Scattergl: WebGL instead of one SVG path per edge)
+            traces.append(
+                go.Scattergl(
+                    x=xs,
+                    y=ys,
                     mode="lines",
                     line=dict(width=1),
                     opacity=0.85,
@@ -263,11 +344,11 @@ class GanttFigureBuilder:
                 )
             )
 
-            # arrowhead marker at child start
-            fig.add_trace(
-                go.Scatter(
-                    x=[child[TaskSchema.COL_START]],
-                    y=[child[TaskSchema.COL_NAME]],
+            # arrowhead markers at child starts
+            traces.append(
+                go.Scattergl(
+                    x=head_x,
+                    y=head_y,
                     mode="markers",
                     marker=dict(size=8, symbol="triangle-right"),
                     opacity=0.85,
@@ -278,52 +359,22 @@ class GanttFigureBuilder:
             )
 
         # -------------------------
-        # 5) Weekend bands
+        # 5) Weekend bands + NOW marker, collected as plain layout dicts
         # -------------------------
+        shapes: List[dict] = []
+        annotations: List[dict] = []
         if not df_chart.empty:
-            self.add_weekend_vrects(fig, df_chart[TaskSchema.COL_START].min(), df_chart[TaskSchema.COL_END].max())
+            xmin_ts = pd.to_datetime(df_chart[COL_START].min())
+            xmax_ts = pd.to_datetime(df_chart[COL_END].max())
+            shapes += self.weekend_shapes(xmin_ts, xmax_ts)
 
-        # -------------------------
-        # 6) Status legend entries (clickable toggles)
-        # -------------------------
-        fig.add_trace(
-            go.Scatter(
-                x=[None],
-                y=[None],
-                mode="markers",
-                marker=dict(color="rgba(160,160,160,0.85)", size=10),
-                name="Review",
-                showlegend=True,
-                legendgroup="status:Review",
-                legendgrouptitle=dict(text="Status"),
-            )
-        )
-        fig.add_trace(
-            go.Scatter(
-                x=[None],
-                y=[None],
-                mode="markers",
-                marker=dict(color="rgba(90,90,90,0.90)", size=10),
-                name="Done",
-                showlegend=True,
-                legendgroup="status:Done",
-                legendgrouptitle=dict(text="Status"),
-            )
-        )
-
-        # -------------------------
-        # Current time (NOW) vertical line  ※add_shape版（安全）
-        # -------------------------
-        if not df_chart.empty:
+            # Current time (NOW) vertical line
             now_ts = pd.Timestamp.now()
-            xmin_ts = pd.to_datetime(df_chart[TaskSchema.COL_START].min())
-            xmax_ts = pd.to_datetime(df_chart[TaskSchema.COL_END].max())
-
             if pd.notna(xmin_ts) and pd.notna(xmax_ts) and (xmin_ts <= now_ts <= xmax_ts):
                 x_now = now_ts.to_pydatetime()  # datetime.datetime
 
                 # 縦線（y方向はプロット全体=paper 0..1）
-                fig.add_shape(
+                shapes.append(dict(
                     type="line",
                     x0=x_now, x1=x_now,
                     y0=0, y1=1,
@@ -332,10 +383,10 @@ class GanttFigureBuilder:
                     line=dict(color="red", width=2),
                     opacity=0.8,
                     layer="above",
-                )
+                ))
 
-                # ラベルが欲しければ annotation を別で追加（これなら安全）
-                fig.add_annotation(
+                # ラベルは annotation を別で追加
+                annotations.append(dict(
                     x=x_now,
                     y=1,
                     xref="x",
@@ -344,6 +395,34 @@ class GanttFigureBuilder:
                     showarrow=False,
                     font=dict(color="red"),
                     yanchor="bottom",
-                )
+                ))
+
+        # -------------------------
+        # Figure: one construction from the accumulated traces and layout —
+        # every incremental update_*/add_shape call validates a layout copy
+        # -------------------------
+        fig = go.Figure(
+            data=traces,
+            layout=dict(
+                title=UI["title_gantt_full"],
+                height=max(520, 28 * max(len(df_chart), 1) + 260),
+                xaxis=dict(
+                    type="date",
+                    title=UI["xaxis"],
+                    tickformat="%Y-%m-%d\n%H:%M",
+                    dtick=24*60*60*1000,
+                ),
+                yaxis=dict(type="category", autorange="reversed", title=UI["yaxis"]),
+                legend=dict(groupclick="togglegroup", title=dict(text=UI["legend_category"])),
+                barmode="overlay",
+                # keep legend toggles even if figure is regenerated
+                uirevision="gantt",
+                shapes=shapes,
+                annotations=annotations,
+            ),
+        )
 
+        self._fig_cache[key] = fig
+        if len(self._fig_cache) > self._FIG_CACHE_SIZE:
+            self._fig_cache.popitem(last=False)
         return fig
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
 from .schema import TaskSchema, JP_TO_EN, STATUS_TODO, ALLOWED_STATUS
 
+try:
+    from python_calamine import CalamineError
+except ImportError:  # calamine absent — the ImportError below covers it
+    CalamineError = ImportError
+
+# what a failed calamine read can raise before we retry with openpyxl
+CALAMINE_READ_ERRORS = (ImportError, ValueError, CalamineError)
+
 
 class ExcelTaskRepository:
     """Read/Write Excel. Internally normalizes types."""
@@ -13,7 +22,7 @@ class ExcelTaskRepository:
         self.sheet_name = sheet_name
 
     def load(self) -> pd.DataFrame:
-        df = pd.read_excel(self.xlsx_path, sheet_name=self.sheet_name)
+        df = self._read_excel()
         df = self._maybe_rename_jp_to_en(df)
 
         if TaskSchema.COL_STATUS not in df.columns:
@@ -33,13 +42,54 @@ class ExcelTaskRepository:
             df_out[col] = pd.to_datetime(df_out[col], errors="coerce").dt.strftime("%Y-%m-%d")
 
         df_out = df_out[TaskSchema.REQUIRED]
-        df_out.to_excel(out_path, index=False)
+        try:
+            # xlsxwriter writes noticeably faster than the openpyxl default.
+            # (constant_memory doesn't fit: pandas emits cells column-wise,
+            # and streaming mode drops everything behind the write cursor.)
+            df_out.to_excel(out_path, index=False, engine="xlsxwriter")
+        except ImportError:
+            df_out.to_excel(out_path, index=False)
         return out_path
 
+    # Progress is deliberately absent: a text cell ("TBD") would make the
+    # read itself raise; _normalize coerces it to numeric with errors="coerce"
+    _DTYPE_BY_EN = {
+        TaskSchema.COL_ID: "string",
+        TaskSchema.COL_PARENT: "string",
+        TaskSchema.COL_CATEGORY: "string",
+        TaskSchema.COL_STATUS: "string",
+    }
+
+    def _read_excel(self) -> pd.DataFrame:
+        # calamine (Rust) parses xlsx much faster than openpyxl; fall back to
+        # openpyxl in read-only/data-only mode for workbooks calamine rejects.
+        try:
+            return self._read_excel_with(engine="calamine")
+        except CALAMINE_READ_ERRORS:
+            return self._read_excel_with(
+                engine_kwargs={"read_only": True, "data_only": True, "keep_links": False},
+            )
+
+    def _read_excel_with(self, **engine_opts) -> pd.DataFrame:
+        # header-only probe so usecols/dtype can be mapped for JP sheets too
+        header = pd.read_excel(self.xlsx_path, sheet_name=self.sheet_name, nrows=0, **engine_opts)
+        en_of = {str(c): JP_TO_EN.get(str(c), str(c)) for c in header.columns}
+
+        usecols = [c for c, en in en_of.items() if en in TaskSchema.REQUIRED]
+        dtype = {c: self._DTYPE_BY_EN[en] for c, en in en_of.items() if en in self._DTYPE_BY_EN}
+
+        return pd.read_excel(
+            self.xlsx_path,
+            sheet_name=self.sheet_name,
+            usecols=usecols or None,
+            dtype=dtype,
+            **engine_opts,
+        )
+
     def _maybe_rename_jp_to_en(self, df: pd.DataFrame) -> pd.DataFrame:
-        cols = set(df.columns.astype(str))
-        jp_cols = set(JP_TO_EN.keys())
-        if cols & jp_cols:
+        # any() short-circuits on the first JP heading, so English sheets pay
+        # one scan with no set allocations
+        if any(c in JP_TO_EN for c in df.columns):
             df = df.rename(columns={c: JP_TO_EN[c] for c in df.columns if c in JP_TO_EN})
         return df
 
@@ -49,23 +99,38 @@ class ExcelTaskRepository:
             raise ValueError(f"Excel is missing required columns: {missing}")
 
     def _normalize(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-
-        df[TaskSchema.COL_ID] = df[TaskSchema.COL_ID].astype(str).str.strip()
-        df[TaskSchema.COL_PARENT] = df[TaskSchema.COL_PARENT].fillna("").astype(str).str.strip()
-        df[TaskSchema.COL_CATEGORY] = df[TaskSchema.COL_CATEGORY].fillna("Uncategorized").astype(str).str.strip()
+        # Takes ownership of `df`: every caller hands in a frame it just built
+        # (read_excel / from_records / store payload), so normalizing in place
+        # avoids duplicating all columns up front. Copy-on-write keeps any
+        # frames that share blocks with the input unaffected.
+
+        # one string-dtype pass per column: fillna + strip dispatch in C
+        fill_values = {
+            TaskSchema.COL_ID: "",
+            TaskSchema.COL_PARENT: "",
+            TaskSchema.COL_CATEGORY: "Uncategorized",
+            TaskSchema.COL_STATUS: STATUS_TODO,
+        }
+        for col, fill in fill_values.items():
+            df[col] = df[col].astype("string").fillna(fill).str.strip()
 
         df[TaskSchema.COL_START] = pd.to_datetime(df[TaskSchema.COL_START], errors="coerce")
         df[TaskSchema.COL_END] = pd.to_datetime(df[TaskSchema.COL_END], errors="coerce")
 
-        df[TaskSchema.COL_PROGRESS] = (
-            pd.to_numeric(df[TaskSchema.COL_PROGRESS], errors="coerce")
-            .fillna(0)
-            .clip(0, 100)
-        )
+        prog = pd.to_numeric(df[TaskSchema.COL_PROGRESS], errors="coerce").fillna(0).to_numpy(np.float64)
+        df[TaskSchema.COL_PROGRESS] = np.clip(prog, 0, 100)
 
-        df[TaskSchema.COL_STATUS] = df[TaskSchema.COL_STATUS].fillna(STATUS_TODO).astype(str).str.strip()
         df.loc[~df[TaskSchema.COL_STATUS].isin(ALLOWED_STATUS), TaskSchema.COL_STATUS] = STATUS_TODO
 
         df = df.sort_values([TaskSchema.COL_START, TaskSchema.COL_CATEGORY, TaskSchema.COL_NAME]).reset_index(drop=True)
+
+        # categorical codes: cheap isin/groupby and a compact store payload
+        df[TaskSchema.COL_STATUS] = df[TaskSchema.COL_STATUS].astype(
+            pd.CategoricalDtype(sorted(ALLOWED_STATUS))
+        )
+        df[TaskSchema.COL_CATEGORY] = df[TaskSchema.COL_CATEGORY].astype("category")
+
+        # pre-formatted date strings so table rendering can skip strftime
+        df["_start_str"] = df[TaskSchema.COL_START].dt.strftime("%Y-%m-%d %H:%M")
+        df["_end_str"] = df[TaskSchema.COL_END].dt.strftime("%Y-%m-%d %H:%M")
         return df
@@ -11,27 +11,20 @@ class DependencyService:
     COL_BLOCK = "Blocked"  # OK / BLOCKED
 
     def add_blocked(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        id_to_prog = df.set_index(TaskSchema.COL_ID)[TaskSchema.COL_PROGRESS].to_dict()
-        id_exists = set(id_to_prog.keys())
+        prog_map = df.set_index(TaskSchema.COL_ID)[TaskSchema.COL_PROGRESS].astype(float)
+        # same "last one wins" semantics as the old dict lookup on duplicate IDs
+        prog_map = prog_map[~prog_map.index.duplicated(keep="last")]
 
-        def blocked(row) -> bool:
-            parent = row[TaskSchema.COL_PARENT]
-            if parent == "":
-                return False
-            if parent not in id_exists:
-                return True
-            return float(id_to_prog[parent]) < 100
-
-        df[self.COL_BLOCK] = np.where(df.apply(blocked, axis=1), "BLOCKED", "OK")
-        return df
+        parent = df[TaskSchema.COL_PARENT].astype(str).str.strip()
+        parent_prog = parent.map(prog_map)
+        # blocked = has a parent AND (parent unknown OR parent not 100% done)
+        mask = (parent != "") & (parent_prog.isna() | (parent_prog < 100))
+        return df.assign(**{self.COL_BLOCK: np.where(mask.to_numpy(), "BLOCKED", "OK")})
 
     def iter_dependencies(self, df: pd.DataFrame) -> List[Tuple[str, str]]:
-        deps: List[Tuple[str, str]] = []
-        id_set = set(df[TaskSchema.COL_ID].astype(str))
-        for _, r in df.iterrows():
-            child = str(r[TaskSchema.COL_ID])
-            parent = str(r[TaskSchema.COL_PARENT]).strip()
-            if parent and parent in id_set:
-                deps.append((parent, child))
-        return deps
+        ids = df[TaskSchema.COL_ID].astype(str).to_numpy()
+        parents = df[TaskSchema.COL_PARENT].astype(str).str.strip().to_numpy()
+
+        # keep only edges whose parent actually exists as a task ID
+        mask = (parents != "") & np.isin(parents, ids)
+        return list(zip(parents[mask].tolist(), ids[mask].tolist()))
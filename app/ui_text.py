@@ -7,6 +7,7 @@ UI = {
     "btn_export": "Export Updated Excel (Server Side)",
     "msg_no_data": "No data.",
     "msg_saved_prefix": "Saved:",
+    "msg_saving_prefix": "Saving:",
     "xaxis": "Date",
     "yaxis": "Task",
     "legend_category": "Category",